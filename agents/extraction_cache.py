@@ -0,0 +1,90 @@
+"""
+Extraction Cache - Content-addressable cache for GPT extraction results
+Keyed by model + prompt + content so reruns of the same site skip the LLM call
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+
+class ExtractionCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _hash_part(self, hasher, part):
+        """Feed one length-prefixed field into the hash (8-byte big-endian length)"""
+        data = part.encode('utf-8')
+        hasher.update(len(data).to_bytes(8, 'big'))
+        hasher.update(data)
+
+    def build_key(self, model, system_prompt, cleaned_content, base_url):
+        """
+        Build the cache key for one extraction call
+
+        The key covers everything that determines the LLM output: the model,
+        the full system prompt (which embeds the template), the cleaned
+        content, and the base URL. Each field is length-prefixed before
+        hashing so field boundaries can't collide.
+
+        Returns:
+            str: Hex sha256 digest used as the cache filename
+        """
+        hasher = hashlib.sha256()
+        for part in (model, system_prompt, cleaned_content, base_url):
+            self._hash_part(hasher, part)
+        return hasher.hexdigest()
+
+    def get(self, key, template=None):
+        """
+        Look up a cached extraction result
+
+        Args:
+            key (str): Cache key from build_key
+            template (dict): Optional extraction template; when given, cached
+                results missing top-level template sections are treated as
+                stale and ignored
+
+        Returns:
+            dict or None: The cached result, or None on miss
+        """
+        cache_path = os.path.join(self.cache_dir, f"{key}.json")
+
+        if not os.path.exists(cache_path):
+            return None
+
+        try:
+            with open(cache_path, 'r') as f:
+                entry = json.load(f)
+        except Exception as e:
+            print(f"Could not read cache entry {key[:12]}: {e}")
+            return None
+
+        result = entry.get('result')
+        if not isinstance(result, dict):
+            return None
+
+        # Revalidate against the template so schema changes invalidate old entries
+        if template:
+            if any(section not in result for section in template):
+                return None
+
+        return result
+
+    def set(self, key, model, system_prompt, result):
+        """Store an extraction result under the given key"""
+        cache_path = os.path.join(self.cache_dir, f"{key}.json")
+
+        entry = {
+            'model': model,
+            'prompt_sha': hashlib.sha256(system_prompt.encode('utf-8')).hexdigest(),
+            'timestamp_utc': datetime.now(timezone.utc).isoformat(),
+            'result': result
+        }
+
+        try:
+            with open(cache_path, 'w') as f:
+                json.dump(entry, f)
+        except Exception as e:
+            print(f"Could not write cache entry {key[:12]}: {e}")
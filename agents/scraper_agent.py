@@ -2,20 +2,98 @@
 Scraper Agent - Uses LLM to extract structured company data from cleaned website content
 """
 import json
+import time
 import yaml
+import tiktoken
 from openai import OpenAI
 from knowledge.scraping_config import load_extraction_template
+from agents.extraction_cache import ExtractionCache
 import os
 
+# Hard cap on content tokens per extraction call - latency scales with prompt size
+MAX_CONTENT_TOKENS = 60000
+
+
+def _build_json_schema(node):
+    """Translate the extraction template into a strict JSON schema"""
+    if isinstance(node, dict):
+        return {
+            "type": "object",
+            "properties": {key: _build_json_schema(value) for key, value in node.items()},
+            "required": list(node.keys()),
+            "additionalProperties": False
+        }
+
+    # Template leaves are description strings; use "Not available" when missing
+    return {"type": "string", "description": str(node)}
+
+
+# Process-wide singletons - building these per ScraperAgent instance would
+# re-read the prompt file, re-parse the template YAML, and open a fresh
+# httpx pool on every instantiation
+_CLIENT = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+_TEMPLATE = load_extraction_template()
+_MODEL = "gpt-4o"
+_ENC = tiktoken.encoding_for_model(_MODEL)
+
+# Field count is fixed per template - compute the validation denominator once
+_TOTAL_TEMPLATE_FIELDS = sum(
+    len(section) for section in _TEMPLATE.values() if isinstance(section, dict)
+)
+
+# Compact template once - no need to pay for pretty-printed JSON per call
+_TEMPLATE_COMPACT = json.dumps(_TEMPLATE, separators=(",", ":"))
+
+# Load system prompt and append the static template + task block.
+# Keeping everything static in the system prompt gives OpenAI prompt
+# caching an identical prefix across calls; the user message then only
+# carries the per-call URL and content.
+with open('prompts/scraper_agent_prompt.txt', 'r') as f:
+    _SYSTEM_PROMPT = f.read()
+
+_SYSTEM_PROMPT += f"""
+
+EXTRACTION TEMPLATE:
+{_TEMPLATE_COMPACT}
+
+For each field in the template:
+- If information is found, provide the specific details
+- If information is not available, use "Not available"
+- Be accurate and specific - include numbers, dates, and exact details when found
+- Focus on factual information rather than marketing language
+"""
+
+# Build the JSON schema once so the API enforces the template structure
+_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "company_profile",
+        "schema": _build_json_schema(_TEMPLATE),
+        "strict": True
+    }
+}
+
+
 class ScraperAgent:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        self.template = load_extraction_template()
-        
-        # Load system prompt
-        with open('prompts/scraper_agent_prompt.txt', 'r') as f:
-            self.system_prompt = f.read()
-    
+    def __init__(self, cache_dir=None):
+        # Bind the shared singletons - instantiation is now allocation-free
+        self.client = _CLIENT
+        self.template = _TEMPLATE
+        self.model = _MODEL
+        self.enc = _ENC
+        self.total_template_fields = _TOTAL_TEMPLATE_FIELDS
+        self.template_compact = _TEMPLATE_COMPACT
+        self.system_prompt = _SYSTEM_PROMPT
+        self.response_format = _RESPONSE_FORMAT
+
+        # On-disk cache so reruns over the same content skip the LLM call.
+        # Defaults from the environment (mirroring GPT_CACHE_DIR in the
+        # scrapetest pipeline) so the workflow gets it without plumbing;
+        # set EXTRACTION_CACHE_DIR to an empty string to disable.
+        if cache_dir is None:
+            cache_dir = os.getenv('EXTRACTION_CACHE_DIR', '.extraction_cache')
+        self.cache = ExtractionCache(cache_dir) if cache_dir else None
+
     def extract_company_data(self, cleaned_content, base_url):
         """
         Extract structured company data from cleaned website content using GPT
@@ -28,105 +106,185 @@ class ScraperAgent:
             dict: Extracted company data matching the template structure
         """
         print(f"Starting GPT extraction for: {base_url}")
-        print(f"Content length: {len(cleaned_content):,} characters")
-        
+
+        # Truncate to the token budget - content is ordered homepage-first so
+        # the highest-signal pages survive the cut
+        tokens = self.enc.encode(cleaned_content)
+        if len(tokens) > MAX_CONTENT_TOKENS:
+            cleaned_content = self.enc.decode(tokens[:MAX_CONTENT_TOKENS])
+            print(f"Content truncated to {MAX_CONTENT_TOKENS:,} tokens")
+
+        print(f"Content length: {len(cleaned_content):,} characters ({len(tokens):,} tokens)")
+
+        # Check the cache before paying for an LLM call
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.build_key(self.model, self.system_prompt, cleaned_content, base_url)
+            cached_result = self.cache.get(cache_key, template=self.template)
+            if cached_result is not None:
+                print(f"Cache hit for: {base_url}")
+                return cached_result
+
         # Build the extraction prompt
         prompt = self._build_extraction_prompt(cleaned_content, base_url)
-        
+
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+
         try:
-            # Call OpenAI API (new format)
-            response = self.client.chat.completions.create(
-                model="gpt-4o",  # Use GPT-4o (GPT-4.0)
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=4000,
-                temperature=0.1  # Low temperature for consistent extraction
-            )
-            
-            # Parse the response
-            extracted_text = response.choices[0].message.content
-            
-            # Try to parse as JSON
-            try:
-                extracted_data = json.loads(extracted_text)
-                print("Successfully extracted structured data")
-                return extracted_data
-                
-            except json.JSONDecodeError:
-                print("Response not in JSON format, attempting to structure...")
-                # If not JSON, try to structure the response
-                return self._structure_text_response(extracted_text)
-                
+            # Retry once with the validation error fed back to the model
+            for attempt in range(2):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    response_format=self.response_format,
+                    max_tokens=4000,
+                    temperature=0.1  # Low temperature for consistent extraction
+                )
+
+                # Structured outputs guarantee valid JSON matching the schema
+                extracted_data = json.loads(response.choices[0].message.content)
+
+                validation_error = self._check_template_sections(extracted_data)
+                if not validation_error:
+                    print("Successfully extracted structured data")
+
+                    if self.cache and cache_key:
+                        self.cache.set(cache_key, self.model, self.system_prompt, extracted_data)
+
+                    return extracted_data
+
+                print(f"Validation failed (attempt {attempt + 1}): {validation_error}")
+                messages.append({"role": "assistant", "content": response.choices[0].message.content})
+                messages.append({"role": "user", "content": f"The previous response was invalid: {validation_error}. Return the corrected JSON."})
+                time.sleep(1 * (attempt + 1))
+
+            return {
+                'error': f"Validation failed after retries: {validation_error}",
+                'extraction_failed': True
+            }
+
         except Exception as e:
             print(f"Error in GPT extraction: {str(e)}")
             return {
                 'error': str(e),
                 'extraction_failed': True
             }
+
+    def _check_template_sections(self, extracted_data):
+        """Check the response covers the template; return an error message or None"""
+        if not isinstance(extracted_data, dict):
+            return "Response is not a JSON object"
+
+        missing = [section for section in self.template if section not in extracted_data]
+        if missing:
+            return f"Missing sections: {', '.join(missing)}"
+
+        return None
     
-    def _build_extraction_prompt(self, content, base_url):
-        """Build the prompt for GPT extraction"""
-        
-        # Convert template to JSON string for the prompt
-        template_json = json.dumps(self.template, indent=2)
-        
-        prompt = f"""
-WEBSITE URL: {base_url}
+    def extract_company_data_iter(self, cleaned_content, base_url):
+        """
+        Streaming variant of extract_company_data
 
-EXTRACTION TEMPLATE:
-{template_json}
+        Streams the GPT response and yields (section_name, section_data)
+        pairs as each top-level template section completes, so callers can
+        start downstream work (validation, DB writes) while the model is
+        still generating later sections.
 
-WEBSITE CONTENT TO ANALYZE:
-{content}
+        Args:
+            cleaned_content (str): Combined cleaned text from all website pages
+            base_url (str): Base URL of the website for context
 
-TASK:
-Analyze the above website content and extract information according to the template structure. 
-Return your response as a valid JSON object that matches the template structure exactly.
+        Yields:
+            tuple: (section_name, section_data) per completed section
+        """
+        print(f"Starting streaming GPT extraction for: {base_url}")
 
-For each field in the template:
-- If information is found, provide the specific details
-- If information is not available, use "Not available"
-- Be accurate and specific - include numbers, dates, and exact details when found
-- Focus on factual information rather than marketing language
+        tokens = self.enc.encode(cleaned_content)
+        if len(tokens) > MAX_CONTENT_TOKENS:
+            cleaned_content = self.enc.decode(tokens[:MAX_CONTENT_TOKENS])
 
-Return ONLY the JSON object, no additional text or explanation.
-"""
-        
-        return prompt
-    
-    def _structure_text_response(self, text_response):
-        """Attempt to structure a text response into our template format"""
-        print("Attempting to structure text response...")
-        
-        # This is a fallback - try to extract key information from text
-        structured_data = {}
-        
-        # Basic company info extraction patterns
-        company_patterns = {
-            'company_name': r'Company Name?:?\s*([^\n]+)',
-            'headquarters': r'(?:Headquarters?|Location|Address):?\s*([^\n]+)',
-            'founded': r'(?:Founded|Established):?\s*(\d{4})',
-        }
-        
-        import re
-        
-        for key, pattern in company_patterns.items():
-            match = re.search(pattern, text_response, re.IGNORECASE)
-            if match:
-                structured_data[key] = match.group(1).strip()
-        
-        # If we couldn't extract much, return the raw text with error flag
-        if len(structured_data) < 2:
-            return {
-                'extraction_method': 'text_fallback',
-                'raw_response': text_response,
-                'structured_data': structured_data,
-                'note': 'Could not parse into full JSON structure'
-            }
-        
-        return structured_data
+        prompt = self._build_extraction_prompt(cleaned_content, base_url)
+
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            response_format=self.response_format,
+            max_tokens=4000,
+            temperature=0.1,
+            stream=True
+        )
+
+        buffer = ""
+        emitted = 0
+
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+
+            buffer += delta
+
+            # A section can only complete when a closing brace arrives
+            if '}' not in delta:
+                continue
+
+            sections = self._completed_sections(buffer)
+            for section_name, section_data in sections[emitted:]:
+                emitted += 1
+                yield section_name, section_data
+
+    def _completed_sections(self, buffer):
+        """Pull fully-received top-level sections out of a partial JSON buffer"""
+        sections = []
+        depth = 0
+        in_string = False
+        escape = False
+        key_start = None
+        value_start = None
+        current_key = None
+
+        for i, ch in enumerate(buffer):
+            if escape:
+                escape = False
+                continue
+            if in_string and ch == '\\':
+                escape = True
+                continue
+            if ch == '"':
+                if not in_string:
+                    in_string = True
+                    if depth == 1 and current_key is None:
+                        key_start = i
+                else:
+                    in_string = False
+                    if depth == 1 and current_key is None and key_start is not None:
+                        current_key = buffer[key_start + 1:i]
+                        key_start = None
+                continue
+            if in_string:
+                continue
+            if ch in '{[':
+                if depth == 1 and current_key is not None and value_start is None:
+                    value_start = i
+                depth += 1
+            elif ch in '}]':
+                depth -= 1
+                if depth == 1 and current_key is not None and value_start is not None:
+                    sections.append((current_key, json.loads(buffer[value_start:i + 1])))
+                    current_key = None
+                    value_start = None
+
+        return sections
+
+    def _build_extraction_prompt(self, content, base_url):
+        """Build the per-call prompt - just URL and content, the rest is in the system prompt"""
+        return f"WEBSITE URL: {base_url}\n\nWEBSITE CONTENT TO ANALYZE:\n{content}"
     
     def validate_extraction(self, extracted_data):
         """Validate that the extracted data meets quality standards"""
@@ -140,20 +298,20 @@ Return ONLY the JSON object, no additional text or explanation.
             if section not in extracted_data:
                 return False, f"Missing required section: {section}"
         
-        # Check for some actual content (not all "Not available")
-        total_fields = 0
+        # Check for some actual content (not all "Not available") - bail out
+        # as soon as enough fields are populated to pass
+        if self.total_template_fields == 0:
+            return False, "Empty extraction template"
+
+        min_available = self.total_template_fields * 0.1  # 10% completion threshold
         available_fields = 0
-        
+
         for section_data in extracted_data.values():
             if isinstance(section_data, dict):
                 for value in section_data.values():
-                    total_fields += 1
                     if value and value != "Not available" and value != "Not found":
                         available_fields += 1
-        
-        completion_rate = available_fields / total_fields if total_fields > 0 else 0
-        
-        if completion_rate < 0.1:  # Less than 10% completion
-            return False, f"Low completion rate: {completion_rate:.1%}"
-        
-        return True, f"Extraction valid with {completion_rate:.1%} completion"
+            if available_fields >= min_available:
+                return True, f"Extraction valid with at least {available_fields / self.total_template_fields:.1%} completion"
+
+        return False, f"Low completion rate: {available_fields / self.total_template_fields:.1%}"
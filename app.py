@@ -1,16 +1,42 @@
 from flask import Flask, request, jsonify
-import json
+from flask.json.provider import JSONProvider
+import atexit
+import gzip
+import logging
+import orjson
 import os
+import queue
+import random
+import threading
+import time
+import httpx
+from postgrest.exceptions import APIError
 from supabase import create_client
+from supabase.lib.client_options import ClientOptions
 from datetime import datetime, timezone
 import hmac
-import hashlib
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Gated logging - payload dumps only run at DEBUG, which stays off in prod
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
+logger = logging.getLogger(__name__)
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson - much faster on big webhook payloads"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 
 # Get from environment variables (try different possible names)
 SUPABASE_URL = os.getenv('SUPABASE_URL')
@@ -21,37 +47,234 @@ SUPABASE_ANON_KEY = (
     os.getenv('SUPABASE_API_KEY')
 )
 HMAC_SECRET = os.getenv('HMAC_SECRET')
+# Encode once - the per-request hot path only needs the bytes
+HMAC_SECRET_BYTES = HMAC_SECRET.encode('utf-8') if HMAC_SECRET else None
+
+# Inline the raw webhook payload into the conversations row only when
+# explicitly debugging - it's tens of KB per row and doubles insert bandwidth
+DEBUG_STORE_RAW = os.getenv('DEBUG_STORE_RAW') == '1'
 
-print(f"🔧 SUPABASE_URL: {SUPABASE_URL[:20]}..." if SUPABASE_URL else "❌ SUPABASE_URL not found")
-print(f"🔧 SUPABASE_ANON_KEY: {'✅ Found' if SUPABASE_ANON_KEY else '❌ Not found'}")
-print(f"🔧 HMAC_SECRET: {'✅ Found' if HMAC_SECRET else '❌ Not found'}")
+logger.info(f"🔧 SUPABASE_URL: {SUPABASE_URL[:20]}..." if SUPABASE_URL else "❌ SUPABASE_URL not found")
+logger.info(f"🔧 SUPABASE_ANON_KEY: {'✅ Found' if SUPABASE_ANON_KEY else '❌ Not found'}")
+logger.info(f"🔧 HMAC_SECRET: {'✅ Found' if HMAC_SECRET else '❌ Not found'}")
 
 # Debug: Show all environment variables that contain 'SUPABASE'
-print("🔍 All SUPABASE env vars:")
-for key, value in os.environ.items():
-    if 'SUPABASE' in key.upper():
-        print(f"  {key}: {value[:20]}..." if value else f"  {key}: (empty)")
+if logger.isEnabledFor(logging.DEBUG):
+    logger.debug("🔍 All SUPABASE env vars:")
+    # startswith is a C-level prefix check - no uppercased copy per key
+    for key in (k for k in os.environ if k.startswith('SUPABASE')):
+        value = os.environ[key]
+        logger.debug(f"  {key}: {value[:20]}..." if value else f"  {key}: (empty)")
 
 if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-    print("❌ Missing required environment variables!")
-    print("In Render dashboard, make sure you have:")
-    print("SUPABASE_URL=https://your-project.supabase.co")
-    print("SUPABASE_ANON_KEY=your-anon-key (or SUPABASE_KEY)")
+    logger.error("❌ Missing required environment variables!")
+    logger.info("In Render dashboard, make sure you have:")
+    logger.info("SUPABASE_URL=https://your-project.supabase.co")
+    logger.info("SUPABASE_ANON_KEY=your-anon-key (or SUPABASE_KEY)")
     exit(1)
 
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+# Keep-alive connection pool so bursts of webhook traffic reuse TLS
+# connections instead of paying a fresh handshake per Supabase call
+_http_client = httpx.Client(
+    http2=True,
+    limits=httpx.Limits(
+        max_keepalive_connections=15,
+        max_connections=50,
+        keepalive_expiry=30.0
+    ),
+    timeout=30.0
+)
+
+supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY, options=ClientOptions(
+    httpx_client=_http_client
+))
+
+# Pre-ping: warm DNS/TLS session state at startup so the first webhook pays
+# less handshake. Uses a throwaway request rather than the pooled client -
+# under gunicorn --preload this runs pre-fork, and a pooled connection opened
+# here would be shared (and corrupted) across forked workers.
+try:
+    httpx.get(f"{SUPABASE_URL}/rest/v1/", headers={'apikey': SUPABASE_ANON_KEY}, timeout=5.0)
+except Exception as e:
+    logger.warning(f"⚠️  Supabase pre-ping failed: {e}")
+
+# Optional direct-Postgres path for webhook writes: point SUPAVISOR_URL (or
+# DATABASE_URL) at the Supabase transaction pooler on port 6543 to skip
+# PostgREST's per-request HTTP + JWT overhead. Falls back to the REST client.
+SUPAVISOR_URL = os.getenv('SUPAVISOR_URL') or os.getenv('DATABASE_URL')
+pg_writer = None
+if SUPAVISOR_URL:
+    try:
+        from shared_services.postgres_writer import PostgresWriter
+        pg_writer = PostgresWriter(SUPAVISOR_URL)
+        logger.info("🔧 Direct Postgres writer enabled (Supavisor pool)")
+    except Exception as e:
+        logger.warning(f"⚠️  Could not set up direct Postgres writer: {e}")
+
+# Short-lived cache for getUserContext - agents often call it repeatedly
+# within the same conversation, and a 30s TTL keeps it fresh enough
+CONTEXT_CACHE = TTLCache(maxsize=1000, ttl=30)
+
+# Background workers for post-webhook cleanup so ElevenLabs isn't kept
+# waiting on the extra Supabase roundtrips
+EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# Opt-in batched inserts (BATCH_INSERTS=1): webhooks enqueue and return
+# immediately, and a background thread flushes up to 50 rows per PostgREST
+# request every 200ms. Off by default because the caller no longer learns
+# whether its delivery was a duplicate.
+BATCH_INSERTS = os.getenv('BATCH_INSERTS') == '1'
+_INSERT_QUEUE = queue.SimpleQueue()
+_BATCH_MAX = 50
+_BATCH_WINDOW = 0.2
+
+def _flush_batch(batch):
+    """Write one batch of conversation records in a single request"""
+    if not batch:
+        return
+    try:
+        with_retry(lambda: supabase.table('conversations').upsert(
+            batch,
+            on_conflict='conversation_id',
+            ignore_duplicates=True
+        ).execute())
+        logger.info("📦 Flushed %d conversation insert(s)", len(batch))
+        for record in batch:
+            EXECUTOR.submit(cleanup_conversation_data, record)
+    except Exception as e:
+        logger.error(f"❌ Batched insert failed for {len(batch)} record(s): {e}")
+
+def _drain_insert_queue():
+    """Background loop: collect records for up to 200ms or 50 rows, then flush"""
+    while True:
+        batch = [_INSERT_QUEUE.get()]
+        deadline = time.time() + _BATCH_WINDOW
+        while len(batch) < _BATCH_MAX:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_INSERT_QUEUE.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _flush_batch(batch)
+
+def _flush_remaining():
+    """Flush whatever is still queued - registered for shutdown (Render SIGTERM)"""
+    batch = []
+    while True:
+        try:
+            batch.append(_INSERT_QUEUE.get_nowait())
+        except queue.Empty:
+            break
+    _flush_batch(batch)
+
+# The drain thread must start in the process that serves requests. Under
+# gunicorn --preload the module is imported once in the master before
+# forking, and threads don't survive fork - a thread started at import
+# would leave every worker enqueueing into a queue nobody drains. Start
+# lazily on first enqueue instead, so each worker gets its own drainer
+# and its own shutdown flush.
+_drain_lock = threading.Lock()
+_drain_started = False
+
+def _enqueue_insert(record):
+    """Queue a record for batched insert, starting this process's drainer"""
+    global _drain_started
+    if not _drain_started:
+        with _drain_lock:
+            if not _drain_started:
+                threading.Thread(target=_drain_insert_queue, daemon=True).start()
+                atexit.register(_flush_remaining)
+                _drain_started = True
+    _INSERT_QUEUE.put(record)
+
+# Meta fields from the ElevenLabs analysis we never persist as user data
+_SKIP_FIELDS = frozenset({'session_id', 'correction_handling', 'information_completeness_tracker'})
+
+# Precompiled context-message templates - pick one, fill the blanks
+_MSG_ALL_DONE = "Welcome back! We've completed your LinkedIn persona: {completed}. Let me summarize everything we have."
+_MSG_PARTIAL = "Welcome back! From our previous session, I have: {completed}. We still need to discuss: {missing}."
+_MSG_EMPTY = "I see we've started before, but I don't have any complete information yet. Let's continue building your LinkedIn persona."
+
+# Persona fields getUserContext reports completion against, paired with
+# their display names - the schema is fixed, so no per-request .title() calls
+_REQUIRED_FIELDS = tuple(
+    (field, field.replace('_', ' ').title())
+    for field in (
+        'broad_domain_expertise',
+        'specific_niche_focus',
+        'ideal_client_definition',
+        'target_customer_problems',
+        'signature_outcomes'
+    )
+)
+
+def _truncate(s, n=40, _ellipsis='…'):
+    """Return s unchanged when it fits, otherwise the first n chars + ellipsis"""
+    return s if len(s) <= n else s[:n] + _ellipsis
+
+# Timestamp cache: webhooks landing within the same second share one
+# formatted string instead of rebuilding it per request. Stored as one
+# (second, string) tuple swapped in a single assignment, so the gthread
+# workers can never observe a new second paired with a stale string.
+_LAST_ISO = (0, "")
+
+def iso_now():
+    """UTC ISO timestamp, memoized at second granularity"""
+    global _LAST_ISO
+    now = int(time.time())
+    cached_second, cached_iso = _LAST_ISO
+    if now != cached_second:
+        cached_iso = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        _LAST_ISO = (now, cached_iso)
+    return cached_iso
+
+def with_retry(fn, attempts=4):
+    """
+    Run a Supabase call with exponential backoff on rate limits
+
+    Supabase returns 429 once the plan's request budget is exhausted (500 RPM
+    on Free, 5000 on Pro); without backoff those bursts became silent
+    failures. Retries 429 and 5xx with jittered exponential delays.
+    """
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except APIError as e:
+            code = str(getattr(e, 'code', ''))
+            retryable = code == '429' or (code.isdigit() and 500 <= int(code) < 600)
+            if not retryable or attempt == attempts - 1:
+                raise
+            delay = (2 ** attempt) * 0.25 + random.random() * 0.1
+            logger.warning(f"⚠️  Supabase returned {code}, retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+# Steady-state roles seen in ElevenLabs transcripts - avoids a Unicode
+# .title() call per turn on long conversations
+_ROLE_TITLES = {'user': 'User', 'agent': 'Agent', 'assistant': 'Assistant', 'system': 'System'}
+
+# Fetches both keys in one C-level call instead of two .get() dispatches
+_ROLE_MESSAGE = itemgetter('role', 'message')
 
 def get_clean_transcript(transcript_array):
     """Convert transcript array to clean readable text"""
-    if isinstance(transcript_array, list):
-        clean_lines = []
+    if not isinstance(transcript_array, list):
+        return str(transcript_array)
+
+    def _lines():
         for turn in transcript_array:
-            if isinstance(turn, dict):
+            try:
+                role, message = _ROLE_MESSAGE(turn)
+            except (TypeError, KeyError):
+                # Malformed turn - fall back to the defaulting lookups
+                if not isinstance(turn, dict):
+                    continue
                 role = turn.get('role', 'unknown')
                 message = turn.get('message', '')
-                clean_lines.append(f"{role.title()}: {message}")
-        return "\n".join(clean_lines)
-    return str(transcript_array)
+            yield f"{_ROLE_TITLES.get(role) or str(role).title()}: {message}"
+
+    return "\n".join(_lines())
 
 def get_user_data(conversation):
     """Extract user ID and name with proper fallbacks"""
@@ -90,57 +313,67 @@ def get_user_context():
     try:
         data = request.get_json()
         user_id = data.get('user_id', 'test_user_123')
-        
-        print(f"🔍 Getting context for user: {user_id}")
-        
-        # Get user's clean data points from the new table
-        result = supabase.table('user_data_points')\
-            .select('data_point_key, value')\
-            .eq('user_id', user_id)\
-            .execute()
-        
-        if not result.data:
-            return jsonify({
+
+        logger.info(f"🔍 Getting context for user: {user_id}")
+        # Serve from cache when the agent re-asks within the TTL window
+        cached_response = CONTEXT_CACHE.get(user_id)
+        if cached_response:
+            logger.info(f"⚡ Context cache hit for user: {user_id}")
+            return jsonify(cached_response)
+
+        # Get user's clean data points - direct Postgres when configured,
+        # PostgREST otherwise
+        data_points = None
+        if pg_writer:
+            try:
+                data_points = pg_writer.fetch_user_data_points(user_id)
+            except Exception as pg_error:
+                logger.warning(f"⚠️  Direct Postgres read failed, falling back to REST: {pg_error}")
+
+        if data_points is None:
+            result = with_retry(lambda: supabase.table('user_data_points')
+                .select('data_point_key, value')
+                .eq('user_id', user_id)
+                .execute())
+            data_points = result.data
+
+        if not data_points:
+            response_payload = {
                 "status": "new_user",
                 "message": "New user - starting fresh. Let's build your LinkedIn persona. What's a broad topic or domain you could speak about confidently for hours?",
                 "context_summary": "No previous sessions found"
-            })
+            }
+            CONTEXT_CACHE[user_id] = response_payload
+            return jsonify(response_payload)
         
         # Process the clean data points
         user_data = {}
-        for item in result.data:
+        for item in data_points:
             user_data[item['data_point_key']] = item['value']
         
         # Check which required fields we have
-        required_fields = [
-            'broad_domain_expertise',
-            'specific_niche_focus', 
-            'ideal_client_definition',
-            'target_customer_problems',
-            'signature_outcomes'
-        ]
-        
         completed_fields = []
         missing_fields = []
-        
-        for field in required_fields:
-            if field in user_data and user_data[field] and user_data[field].strip():
-                field_display = field.replace('_', ' ').title()
-                value_preview = user_data[field][:40] + "..." if len(user_data[field]) > 40 else user_data[field]
-                completed_fields.append(f"{field_display}: {value_preview}")
+
+        for field, display in _REQUIRED_FIELDS:
+            value = user_data.get(field)
+            if value and value.strip():
+                completed_fields.append(f"{display}: {_truncate(value)}")
             else:
-                missing_fields.append(field.replace('_', ' ').title())
+                missing_fields.append(display)
         
-        # Create context message for the agent
-        if completed_fields:
-            if len(missing_fields) == 0:
-                context_message = f"Welcome back! We've completed your LinkedIn persona: {'; '.join(completed_fields)}. Let me summarize everything we have."
-            else:
-                context_message = f"Welcome back! From our previous session, I have: {'; '.join(completed_fields[:2])}{'...' if len(completed_fields) > 2 else ''}. We still need to discuss: {', '.join(missing_fields[:2])}{'...' if len(missing_fields) > 2 else ''}."
+        # Create context message for the agent from the precompiled templates
+        if not completed_fields:
+            context_message = _MSG_EMPTY
+        elif not missing_fields:
+            context_message = _MSG_ALL_DONE.format(completed='; '.join(completed_fields))
         else:
-            context_message = "I see we've started before, but I don't have any complete information yet. Let's continue building your LinkedIn persona."
+            context_message = _MSG_PARTIAL.format(
+                completed='; '.join(completed_fields[:2]) + ('...' if len(completed_fields) > 2 else ''),
+                missing=', '.join(missing_fields[:2]) + ('...' if len(missing_fields) > 2 else '')
+            )
             
-        return jsonify({
+        response_payload = {
             "status": "returning_user",
             "message": context_message,
             "context_summary": f"Completed: {len(completed_fields)}/5 fields | Missing: {', '.join(missing_fields) if missing_fields else 'None'}",
@@ -148,26 +381,26 @@ def get_user_context():
             "missing_count": len(missing_fields),
             "completed_fields": completed_fields,
             "missing_fields": missing_fields
-        })
+        }
+        CONTEXT_CACHE[user_id] = response_payload
+        return jsonify(response_payload)
         
     except Exception as e:
-        print(f"❌ Error in getUserContext: {str(e)}")
+        logger.error(f"❌ Error in getUserContext: {str(e)}")
         return jsonify({
             "status": "error", 
             "message": "Let's build your LinkedIn persona from scratch! What's a broad topic or domain you could speak about confidently for hours?",
             "context_summary": f"Error retrieving context: {str(e)}"
         }), 200  # Return 200 so agent continues
 
-def verify_hmac_signature(raw_data, signature, secret):
+def verify_hmac_signature(raw_data, signature, secret_bytes):
     """Verify HMAC signature from ElevenLabs"""
-    if not signature or not secret:
+    if not signature or not secret_bytes:
         return False
-    
+
     try:
-        print(f"🔍 HMAC DEBUG:")
-        print(f"  Raw signature: {signature}")
-        print(f"  Secret: {secret[:10]}...")
-        
+        logger.debug(f"🔍 HMAC DEBUG:")
+        logger.debug(f"  Raw signature: {signature}")
         # ElevenLabs uses format: t=timestamp,v0=signature
         if 'v0=' in signature:
             # Parse ElevenLabs format: t=timestamp,v0=signature
@@ -181,76 +414,76 @@ def verify_hmac_signature(raw_data, signature, secret):
                 elif part.startswith('v0='):
                     sig_hex = part[3:]
             
-            print(f"  Timestamp: {timestamp}")
-            print(f"  Signature hex: {sig_hex}")
-            
+            logger.debug(f"  Timestamp: {timestamp}")
+            logger.debug(f"  Signature hex: {sig_hex}")
             if not sig_hex:
-                print("❌ No v0= signature found")
+                logger.error("❌ No v0= signature found")
                 return False
             
             # Create payload for HMAC (timestamp + raw data)
             payload = f"{timestamp}.".encode('utf-8') + raw_data
-            
-            # Create HMAC using the secret
-            expected_signature = hmac.new(
-                secret.encode('utf-8'),
-                payload,
-                hashlib.sha256
-            ).hexdigest()
-            
-            print(f"  Expected: {expected_signature}")
-            print(f"  Received: {sig_hex}")
-            
-            # Secure comparison
-            result = hmac.compare_digest(expected_signature, sig_hex)
-            print(f"  Match: {result}")
+
+            # One-shot digest, compared as bytes (no hex round-trip of ours)
+            expected = hmac.digest(secret_bytes, payload, 'sha256')
+
+            try:
+                received = bytes.fromhex(sig_hex)
+            except ValueError:
+                logger.error("❌ Signature is not valid hex")
+                return False
+
+            result = hmac.compare_digest(expected, received)
+            logger.debug(f"  Match: {result}")
             return result
-            
+
         else:
             # Fallback for simple sha256= format
             if signature.startswith('sha256='):
                 signature = signature[7:]
-            
-            expected_signature = hmac.new(
-                secret.encode('utf-8'),
-                raw_data,
-                hashlib.sha256
-            ).hexdigest()
-            
-            return hmac.compare_digest(expected_signature, signature)
+
+            expected = hmac.digest(secret_bytes, raw_data, 'sha256')
+
+            try:
+                received = bytes.fromhex(signature)
+            except ValueError:
+                return False
+
+            return hmac.compare_digest(expected, received)
         
     except Exception as e:
-        print(f"❌ HMAC verification error: {e}")
+        logger.error(f"❌ HMAC verification error: {e}")
         return False
 
 @app.route('/webhook/elevenlabs', methods=['POST'])
 def handle_webhook():
     try:
-        # Get raw data for HMAC verification
-        raw_data = request.get_data()
+        # Get raw data for HMAC verification. cache=False stops Werkzeug from
+        # holding a second copy of the body - this buffer is the only one.
+        raw_data = request.get_data(cache=False)
         signature = request.headers.get('ElevenLabs-Signature')
-        
-        print(f"📥 Received webhook call")
-        print(f"📝 Signature header: {signature}")
-        print(f"📊 Data length: {len(raw_data)} bytes")
-        
+
+        logger.debug("📝 Signature header: %s", signature)
         # HMAC verification (TEMPORARILY DISABLED FOR TESTING)
-        print("🚨 TEMPORARILY BYPASSING HMAC FOR TESTING")
-        # if HMAC_SECRET:
-        #     if not verify_hmac_signature(raw_data, signature, HMAC_SECRET):
+        logger.debug("🚨 TEMPORARILY BYPASSING HMAC FOR TESTING")
+        # if HMAC_SECRET_BYTES:
+        #     if not verify_hmac_signature(raw_data, signature, HMAC_SECRET_BYTES):
         #         print("❌ HMAC verification failed!")
         #         return jsonify({'error': 'invalid_signature'}), 403
         #     print("✅ HMAC verification passed")
         # else:
         #     print("⚠️  HMAC_SECRET not set - skipping verification")
         
-        # Get the JSON data from ElevenLabs
-        data = request.get_json()
-        
-        print("=== RECEIVED WEBHOOK ===")
-        print(json.dumps(data, indent=2))  # This will show you EVERYTHING
-        print("=======================")
-        
+        # Parse the JSON straight from the raw bytes already read for HMAC -
+        # no second body read, and orjson instead of stdlib json
+        data = orjson.loads(raw_data)
+
+        # Full payload dump is expensive (50KB+ serializations) - only pay
+        # for it when DEBUG logging is actually on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=== RECEIVED WEBHOOK ===")
+            logger.debug(orjson.dumps(data, option=orjson.OPT_INDENT_2).decode('utf-8'))
+            logger.debug("=======================")
+
         # Check if it's a conversation transcript
         if data.get('type') == 'post_call_transcription':
             conversation = data.get('data', {})
@@ -259,15 +492,16 @@ def handle_webhook():
             analysis = conversation.get('analysis', {})
             data_collection = analysis.get('data_collection_results', {})
             
-            # Build organized extracted data
-            organized_data = {}
-            for field_name, field_data in data_collection.items():
-                if isinstance(field_data, dict) and 'value' in field_data:
-                    organized_data[field_name] = {
-                        'value': field_data.get('value'),
-                        'rationale': field_data.get('rationale', '')
-                    }
-            
+            # Build organized extracted data in one comprehension pass
+            organized_data = {
+                field_name: {
+                    'value': field_data.get('value'),
+                    'rationale': field_data.get('rationale', '')
+                }
+                for field_name, field_data in data_collection.items()
+                if isinstance(field_data, dict) and 'value' in field_data
+            }
+
             # Extract user data
             user_id, user_name = get_user_data(conversation)
             
@@ -282,125 +516,177 @@ def handle_webhook():
                 'extracted_data': organized_data,  # This is clean organized JSONB data
                 'analysis_summary': analysis.get('transcript_summary', ''),
                 'evaluation_results': analysis.get('evaluation_criteria_results', {}),
-                'created_at': datetime.now(timezone.utc).isoformat(),
-                'full_data': conversation  # Complete raw data as JSONB
+                'created_at': iso_now()
             }
-            
-            print("=== SAVING TO SUPABASE ===")
-            print(f"Conversation ID: {conversation_record['conversation_id']}")
-            print(f"User ID: {conversation_record['user_id']}")
-            print(f"User Name: {conversation_record['user_name']}")
-            print(f"Transcript length: {len(conversation_record['transcript'])} chars")
-            print(f"Extracted fields: {list(organized_data.keys())}")
-            print("=== ORGANIZED EXTRACTED DATA ===")
-            for field, data in organized_data.items():
-                print(f"{field}: {data['value']}")
-            print("=========================")
-            
-            # Save to Supabase - Try UPSERT first, fallback to INSERT
-            print("🔄 Attempting to save conversation...")
-            try:
-                # Try UPSERT first (if unique constraint exists)
-                result = supabase.table('conversations').upsert(
-                    conversation_record,
-                    on_conflict='conversation_id'
-                ).execute()
-                print("✅ Used UPSERT - conversation updated")
-            except Exception as upsert_error:
-                print(f"⚠️  UPSERT failed: {upsert_error}")
-                print("🔄 Falling back to INSERT...")
+
+            if DEBUG_STORE_RAW:
+                conversation_record['full_data'] = conversation  # Complete raw data as JSONB
+            else:
+                # Raw payload goes to cold storage; the row keeps only the path
+                object_path = f"{conversation_record['conversation_id']}.json.gz"
+                EXECUTOR.submit(upload_raw_payload, object_path, conversation)
+                conversation_record['full_data_url'] = f"raw-webhooks/{object_path}"
+
+            # One structured line per webhook - a single write/GIL-release
+            # instead of a burst of banner prints serializing on stdout
+            logger.info(
+                "📥 webhook received id=%s user=%s name=%s bytes=%s transcript_chars=%d fields=%d",
+                conversation_record['conversation_id'],
+                conversation_record['user_id'],
+                conversation_record['user_name'],
+                request.content_length,
+                len(conversation_record['transcript']),
+                len(organized_data)
+            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("=== ORGANIZED EXTRACTED DATA ===")
+                for field, data in organized_data.items():
+                    logger.debug(f"{field}: {data['value']}")
+                logger.debug("=========================")
+
+            # Save to Supabase - prefer the pooled direct-Postgres path,
+            # fall back to the REST client
+            if BATCH_INSERTS:
+                # Enqueue and reply immediately; the background flusher
+                # batches the insert and kicks off cleanup
+                _enqueue_insert(conversation_record)
+                return jsonify({'status': 'queued'}), 200
+
+            logger.debug("🔄 Attempting to save conversation...")
+            saved = False
+            duplicate = False
+
+            if pg_writer:
                 try:
-                    # Fallback to INSERT
-                    result = supabase.table('conversations').insert(conversation_record).execute()
-                    print("✅ Used INSERT - new conversation created")
-                except Exception as insert_error:
-                    print(f"❌ INSERT also failed: {insert_error}")
-                    return jsonify({'error': 'database_error'}), 500
-            
-            if result.data:
-                print("✅ SUCCESS: Data saved to Supabase!")
-                
-                # Run cleanup to extract clean data to user_data_points
-                cleanup_conversation_data(conversation_record)
-                
+                    saved = pg_writer.insert_conversation(conversation_record)
+                    duplicate = not saved
+                    if saved:
+                        logger.debug("✅ Saved via direct Postgres (Supavisor pool)")
+                except Exception as pg_error:
+                    logger.warning(f"⚠️  Direct Postgres write failed, falling back to REST: {pg_error}")
+
+            if not saved and not duplicate:
+                try:
+                    # Insert-if-absent: replayed webhooks hit the
+                    # conversation_id conflict and return no rows
+                    result = with_retry(lambda: supabase.table('conversations').upsert(
+                        conversation_record,
+                        on_conflict='conversation_id',
+                        ignore_duplicates=True
+                    ).execute())
+                except Exception as upsert_error:
+                    logger.warning(f"⚠️  UPSERT failed: {upsert_error}")
+                    logger.info("🔄 Falling back to INSERT...")
+                    try:
+                        # Fallback to INSERT
+                        result = with_retry(lambda: supabase.table('conversations').insert(conversation_record).execute())
+                        logger.info("✅ Used INSERT - new conversation created")
+                    except Exception as insert_error:
+                        logger.error(f"❌ INSERT also failed: {insert_error}")
+                        return jsonify({'error': 'database_error'}), 500
+
+                saved = bool(result.data)
+                duplicate = not saved
+
+            if duplicate:
+                # ElevenLabs retried a webhook we already processed - skip
+                # the rewrite and all downstream cleanup work
+                logger.info(f"⏭️  Duplicate webhook for conversation {conversation_record['conversation_id']} - ignored")
+                return jsonify({'status': 'duplicate_ignored'}), 200
+
+            if saved:
+                logger.debug("✅ SUCCESS: Data saved to Supabase!")
+                # Run cleanup in the background - the webhook reply doesn't
+                # need to wait for the user_data_points writes
+                EXECUTOR.submit(cleanup_conversation_data, conversation_record)
+
                 return jsonify({'status': 'success'}), 200
             else:
-                print("❌ ERROR: Failed to save to Supabase")
+                logger.error("❌ ERROR: Failed to save to Supabase")
                 return jsonify({'error': 'database_error'}), 500
                 
         return jsonify({'status': 'ignored'}), 200
         
     except Exception as e:
-        print(f"❌ ERROR: {str(e)}")
+        logger.error(f"❌ ERROR: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def upload_raw_payload(object_path, conversation):
+    """Fire-and-forget upload of the raw webhook payload to Supabase Storage"""
+    try:
+        # ElevenLabs JSON compresses several-fold - cheaper to store and ship
+        supabase.storage.from_('raw-webhooks').upload(
+            object_path,
+            gzip.compress(orjson.dumps(conversation), compresslevel=3),
+            {'content-type': 'application/gzip', 'upsert': 'true'}
+        )
+        logger.info(f"📦 Raw payload stored: raw-webhooks/{object_path}")
+    except Exception as e:
+        # Raw archive is best-effort - never block or fail the webhook for it
+        logger.warning(f"⚠️  Raw payload upload failed for {object_path}: {e}")
+
 def cleanup_conversation_data(conversation_record):
     """Extract clean values from conversation data and save to user_data_points"""
     try:
-        print("🧹 Starting data cleanup...")
-        
+        logger.info("🧹 Starting data cleanup...")
         user_id = conversation_record['user_id']
         extracted_data = conversation_record['extracted_data']
         created_at = conversation_record['created_at']
         
         if not extracted_data:
-            print("⚠️  No extracted data to clean up")
+            logger.warning("⚠️  No extracted data to clean up")
             return
         
         # Clean and save each field
         cleanup_successes = 0
         cleanup_errors = []
-        
-        # Skip these meta fields - we only want the actual user data
-        skip_fields = ['session_id', 'correction_handling', 'information_completeness_tracker']
-        
-        for field_name, field_data in extracted_data.items():
-            # Skip meta fields
-            if field_name in skip_fields:
-                continue
-                
-            # Only save fields that have actual values
-            if isinstance(field_data, dict) and field_data.get('value'):
-                try:
-                    clean_record = {
-                        'user_id': user_id,
-                        'data_point_key': field_name,
-                        'value': str(field_data['value']).strip(),
-                        'rationale': str(field_data.get('rationale', '')).strip(),
-                        'answered_at': created_at
-                    }
-                    
-                    # Use upsert to handle updates
-                    result = supabase.table('user_data_points').upsert(
-                        clean_record,
-                        on_conflict='user_id,data_point_key'
-                    ).execute()
-                    
-                    if result.data:
-                        cleanup_successes += 1
-                        print(f"✅ Cleaned & saved: {field_name}")
-                    else:
-                        cleanup_errors.append(f"No result for {field_name}")
-                        
-                except Exception as e:
-                    cleanup_errors.append(f"Error cleaning {field_name}: {str(e)}")
-                    print(f"❌ Cleanup error for {field_name}: {e}")
-            else:
-                print(f"⏭️  Skipping {field_name}: no value")
-        
-        print(f"🧹 Cleanup complete: {cleanup_successes} cleaned, {len(cleanup_errors)} errors")
-        
+
+        # Collect all clean records in one comprehension (skipping meta fields
+        # and valueless entries), then write them in ONE batched upsert
+        clean_records = [
+            {
+                'user_id': user_id,
+                'data_point_key': field_name,
+                'value': str(field_data['value']).strip(),
+                'rationale': str(field_data.get('rationale', '')).strip(),
+                'answered_at': created_at
+            }
+            for field_name, field_data in extracted_data.items()
+            if field_name not in _SKIP_FIELDS
+            and isinstance(field_data, dict) and field_data.get('value')
+        ]
+        if clean_records:
+            try:
+                # Single batched upsert for all fields
+                result = with_retry(lambda: supabase.table('user_data_points').upsert(
+                    clean_records,
+                    on_conflict='user_id,data_point_key'
+                ).execute())
+
+                if result.data:
+                    cleanup_successes = len(result.data)
+                    for record in clean_records:
+                        logger.info(f"✅ Cleaned & saved: {record['data_point_key']}")
+                else:
+                    cleanup_errors.append(f"No result for batch of {len(clean_records)} fields")
+
+            except Exception as e:
+                cleanup_errors.append(f"Error saving batch: {str(e)}")
+                logger.error(f"❌ Cleanup batch error: {e}")
+        # Fresh data points make any cached context stale
+        CONTEXT_CACHE.pop(user_id, None)
+
+        logger.info(f"🧹 Cleanup complete: {cleanup_successes} cleaned, {len(cleanup_errors)} errors")
         if cleanup_errors:
-            print("❌ Cleanup errors:")
+            logger.error("❌ Cleanup errors:")
             for error in cleanup_errors:
-                print(f"  - {error}")
-                
+                logger.error(f"  - {error}")
     except Exception as e:
-        print(f"❌ Cleanup failed: {str(e)}")
+        logger.error(f"❌ Cleanup failed: {str(e)}")
         # Don't fail the webhook - just log the error
         
     except Exception as e:
-        print(f"❌ ERROR: {str(e)}")
+        logger.error(f"❌ ERROR: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/test', methods=['GET'])
@@ -408,11 +694,11 @@ def test():
     """Test if everything is working"""
     try:
         # Test Supabase connection
-        result = supabase.table('conversations').select('count').limit(1).execute()
+        result = with_retry(lambda: supabase.table('conversations').select('count').limit(1).execute())
         return jsonify({
             'status': 'working',
             'supabase': 'connected',
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': iso_now()
         }), 200
     except Exception as e:
         return jsonify({
@@ -420,8 +706,20 @@ def test():
             'error': str(e)
         }), 500
 
+# ASGI entry point - lets the app run under uvicorn for higher concurrency:
+#   uvicorn app:asgi_app --host 0.0.0.0 --port $PORT
+# Sync views still run in a thread pool, so this is a deployment option, not
+# an async rewrite (supabase-py and psycopg2 here are synchronous).
+try:
+    from asgiref.wsgi import WsgiToAsgi
+    asgi_app = WsgiToAsgi(app)
+except ImportError:
+    asgi_app = None
+
+# In production run under gunicorn so webhooks are handled concurrently:
+#   gunicorn -k gthread --threads 8 -w 4 app:app --bind 0.0.0.0:$PORT
 if __name__ == '__main__':
-    print("🚀 Starting webhook server...")
-    print("📡 Webhook URL will be: https://one1-labs.onrender.com/webhook/elevenlabs")
-    print("🧪 Test URL: http://localhost:5001/test")
-    app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
+    logger.info("🚀 Starting webhook server (dev mode)...")
+    logger.info("📡 Webhook URL will be: https://one1-labs.onrender.com/webhook/elevenlabs")
+    logger.info("🧪 Test URL: http://localhost:5001/test")
+    app.run(debug=bool(os.getenv('DEBUG')), host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -1,16 +1,24 @@
 """
 Scraping configuration loader
 """
+import functools
 import yaml
 import os
 
+# libyaml's C loader parses 10-20x faster than the pure-Python one when available
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+@functools.lru_cache(maxsize=1)
 def load_scraping_config():
-    """Load scraping configuration from YAML file"""
+    """Load scraping configuration from YAML file (parsed once per process)"""
     config_path = os.path.join(os.path.dirname(__file__), 'scraping_config.yaml')
-    
+
     try:
         with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=_SafeLoader)
     except Exception as e:
         print(f"⚠️  Could not load scraping config: {e}")
         # Return default config
@@ -23,13 +31,14 @@ def load_scraping_config():
             }
         }
 
+@functools.lru_cache(maxsize=1)
 def load_extraction_template():
-    """Load company extraction template from YAML file"""
+    """Load company extraction template from YAML file (parsed once per process)"""
     template_path = os.path.join(os.path.dirname(__file__), 'company_extraction_template.yaml')
-    
+
     try:
         with open(template_path, 'r') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=_SafeLoader)
     except Exception as e:
         print(f"⚠️  Could not load extraction template: {e}")
         return {}
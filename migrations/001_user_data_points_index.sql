@@ -0,0 +1,13 @@
+-- Composite unique index for user_data_points lookups and upserts.
+--
+-- get_user_context filters on user_id, and cleanup_conversation_data upserts
+-- with on_conflict='user_id,data_point_key'. Without this index Postgres
+-- sequential-scans the table on every tool call, which gets slower as the
+-- table grows; the unique index serves both the SELECT and the conflict check.
+--
+-- Run in the Supabase SQL editor (CONCURRENTLY avoids locking writes):
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS user_data_points_user_key_idx
+    ON user_data_points (user_id, data_point_key);
+
+-- Verify the planner uses it (must show Index Scan, not Seq Scan):
+--   EXPLAIN SELECT data_point_key, value FROM user_data_points WHERE user_id = '...';
@@ -0,0 +1,7 @@
+-- Unique constraint on conversations.conversation_id.
+--
+-- The webhook dedupes retried deliveries with ON CONFLICT (conversation_id)
+-- DO NOTHING / ignore_duplicates=True, which requires a unique index on the
+-- column. Run in the Supabase SQL editor:
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS conversations_conversation_id_idx
+    ON conversations (conversation_id);
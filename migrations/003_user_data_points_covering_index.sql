@@ -0,0 +1,12 @@
+-- Covering index for the getUserContext lookup.
+--
+-- The endpoint selects (data_point_key, value) filtered by user_id. The
+-- composite unique index from 001 serves the filter, but Postgres still has
+-- to visit the heap for `value`; INCLUDE-ing it makes the read index-only.
+--
+-- Run in the Supabase SQL editor:
+CREATE INDEX CONCURRENTLY IF NOT EXISTS user_data_points_user_covering_idx
+    ON user_data_points (user_id) INCLUDE (data_point_key, value);
+
+-- Verify with EXPLAIN - the plan should show "Index Only Scan":
+--   EXPLAIN SELECT data_point_key, value FROM user_data_points WHERE user_id = '...';
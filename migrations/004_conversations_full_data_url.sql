@@ -0,0 +1,12 @@
+-- Column backing the raw-payload offload in handle_webhook.
+--
+-- Oversized webhook payloads are gzipped into the 'raw-webhooks' storage
+-- bucket and the conversations row keeps only a pointer. PostgREST rejects
+-- inserts carrying unknown columns, so this must be applied before deploying
+-- that change.
+--
+-- Run in the Supabase SQL editor:
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS full_data_url text;
+
+-- Also create the storage bucket (Storage > New bucket, private):
+--   name: raw-webhooks
@@ -0,0 +1,15 @@
+-- Column backing the raw-HTML offload in ScrapeWorkflow._save_to_database.
+--
+-- Raw page HTML is gzipped into the 'raw_html' storage bucket keyed by job
+-- id and the scrape_jobs row keeps only a pointer; the multi-MB raw_pages
+-- payload is no longer written. PostgREST rejects inserts carrying unknown
+-- columns, so this must be applied before deploying that change.
+--
+-- Run in the Supabase SQL editor:
+ALTER TABLE scrape_jobs ADD COLUMN IF NOT EXISTS raw_html_path text;
+
+-- Also create the storage bucket (Storage > New bucket, private):
+--   name: raw_html
+
+-- Once nothing reads the inlined HTML anymore, reclaim the space with:
+--   ALTER TABLE scrape_jobs DROP COLUMN raw_pages;
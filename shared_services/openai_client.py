@@ -2,7 +2,7 @@
 OpenAI client setup and configuration
 """
 import os
-import openai
+from openai import OpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,15 +10,17 @@ load_dotenv()
 class OpenAIClient:
     def __init__(self):
         self.api_key = os.getenv('OPENAI_API_KEY')
-        
+
         if not self.api_key:
             raise ValueError("Missing OPENAI_API_KEY in environment variables")
-        
-        openai.api_key = self.api_key
-    
+
+        # v1 SDK client instance: no module-global api_key state, and the
+        # SDK reuses its HTTP connection across calls
+        self.client = OpenAI(api_key=self.api_key)
+
     def get_client(self):
-        """Get the OpenAI client (returns openai module)"""
-        return openai
+        """Get the OpenAI client instance"""
+        return self.client
 
 # Global instance
 openai_client = OpenAIClient()
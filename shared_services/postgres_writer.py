@@ -0,0 +1,79 @@
+"""
+Direct Postgres writer for high-frequency webhook inserts
+Bypasses PostgREST's per-request HTTP + JWT overhead by talking straight to
+the Supavisor transaction pooler (port 6543) over a pooled connection
+"""
+from psycopg2.pool import SimpleConnectionPool
+from psycopg2.extras import Json
+
+# Columns stored as JSONB - these need psycopg2's Json adapter
+JSONB_FIELDS = {'extracted_data', 'evaluation_results', 'full_data'}
+
+
+class PostgresWriter:
+    def __init__(self, dsn, min_conn=2, max_conn=10):
+        self.pool = SimpleConnectionPool(min_conn, max_conn, dsn=dsn)
+
+    def fetch_user_data_points(self, user_id):
+        """
+        Read a user's data points directly from Postgres
+
+        Args:
+            user_id (str): User to look up
+
+        Returns:
+            list: [{'data_point_key': ..., 'value': ...}, ...] rows
+        """
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT data_point_key, value FROM user_data_points WHERE user_id = %s",
+                    (user_id,)
+                )
+                rows = cursor.fetchall()
+            conn.commit()
+            return [{'data_point_key': key, 'value': value} for key, value in rows]
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+    def insert_conversation(self, record):
+        """
+        Insert one conversation record, ignoring duplicates on conversation_id
+
+        ElevenLabs retries webhooks on timeout, so replays of the same
+        conversation must not rewrite the row or trigger downstream cleanup.
+
+        Args:
+            record (dict): Column name -> value mapping for the conversations table
+
+        Returns:
+            bool: True if a new row was written, False if it was a duplicate
+        """
+        columns = list(record.keys())
+        values = [Json(value) if column in JSONB_FIELDS else value
+                  for column, value in record.items()]
+
+        placeholders = ', '.join(['%s'] * len(columns))
+
+        sql = (
+            f"INSERT INTO conversations ({', '.join(columns)}) "
+            f"VALUES ({placeholders}) "
+            f"ON CONFLICT (conversation_id) DO NOTHING"
+        )
+
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, values)
+                inserted = cursor.rowcount > 0
+            conn.commit()
+            return inserted
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
@@ -3,6 +3,7 @@ ScraperAPI client setup and configuration
 """
 import os
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,6 +23,13 @@ class ScraperAPIClient:
             'device_type': 'desktop',
             'timeout': 30000
         }
+
+        # Persistent session: keep-alive connections so multi-page scrapes
+        # don't pay a TCP/TLS handshake per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
     
     def scrape_url(self, url, custom_params=None):
         """
@@ -41,7 +49,8 @@ class ScraperAPIClient:
             params.update(custom_params)
         
         try:
-            response = requests.get(self.base_url, params=params)
+            # Client-side timeout so a stalled scrape can't hang the caller
+            response = self.session.get(self.base_url, params=params, timeout=35)
             
             return {
                 'success': response.status_code == 200,
@@ -2,7 +2,9 @@
 Supabase client setup and configuration
 """
 import os
+import httpx
 from supabase import create_client
+from supabase.lib.client_options import ClientOptions
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,7 +22,18 @@ class SupabaseClient:
         if not self.url or not self.key:
             raise ValueError("Missing Supabase credentials in environment variables")
         
-        self.client = create_client(self.url, self.key)
+        # Keep-alive connection pool to avoid a TLS handshake per request
+        self.client = create_client(self.url, self.key, options=ClientOptions(
+            httpx_client=httpx.Client(
+                http2=True,
+                limits=httpx.Limits(
+                    max_keepalive_connections=15,
+                    max_connections=50,
+                    keepalive_expiry=30.0
+                ),
+                timeout=30.0
+            )
+        ))
     
     def get_client(self):
         """Get the Supabase client instance"""
@@ -6,8 +6,7 @@ Test the enhanced comprehensive scraper against Civitas
 import sys
 sys.path.append('/Users/melville/Documents/11 labs webhook')
 
-from scrapetest import scrape_company_website, combine_page_content, extract_company_data_with_gpt, load_extraction_template
-import json
+from scrapetest import scrape_company_website, combine_page_content, extract_company_data_with_gpt, load_extraction_template, dump_json
 from datetime import datetime
 
 def test_comprehensive_extraction():
@@ -38,16 +37,15 @@ def test_comprehensive_extraction():
     
     # Process content
     print("\n🔄 Processing content...")
-    combined_content = combine_page_content(scraped_pages)
+    combined_content, content_meta = combine_page_content(scraped_pages)
     print(f"📄 Combined content: {len(combined_content):,} characters")
-    
+
     # Check for contact detection improvements
-    if "🚨 SMART CONTACT DETECTION:" in combined_content:
+    if content_meta['smart_contact_detected']:
         print("✅ Enhanced contact detection active")
-    
-    if "EXTRACTED_EMAILS:" in combined_content:
-        emails_section = combined_content.split("EXTRACTED_EMAILS:")[1].split("\n")[0]
-        print(f"📧 Pre-extracted emails: {emails_section}")
+
+    if content_meta['extracted_emails']:
+        print(f"📧 Pre-extracted emails: {', '.join(content_meta['extracted_emails'])}")
     
     # Extract with enhanced GPT
     print("\n🤖 Running comprehensive GPT extraction...")
@@ -74,16 +72,15 @@ def test_comprehensive_extraction():
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"comprehensive_civitas_{timestamp}.json"
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump({
-                'url': url,
-                'extraction_timestamp': timestamp,
-                'pages_scraped': len(scraped_pages),
-                'successful_pages': successful_pages,
-                'content_length': len(combined_content),
-                'data_completeness': f"{completeness:.1f}%",
-                'extracted_data': extracted_data
-            }, f, indent=2, ensure_ascii=False)
+        dump_json(filename, {
+            'url': url,
+            'extraction_timestamp': timestamp,
+            'pages_scraped': len(scraped_pages),
+            'successful_pages': successful_pages,
+            'content_length': len(combined_content),
+            'data_completeness': f"{completeness:.1f}%",
+            'extracted_data': extracted_data
+        })
         
         print(f"💾 Results saved to: {filename}")
         
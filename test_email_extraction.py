@@ -6,8 +6,7 @@ Test email extraction improvements
 import sys
 sys.path.append('/Users/melville/Documents/11 labs webhook')
 
-from scrapetest import scrape_company_website, combine_page_content, extract_company_data_with_gpt, load_extraction_template
-import json
+from scrapetest import scrape_company_website, combine_page_content, extract_company_data_with_gpt, load_extraction_template, dump_json
 
 def test_email_extraction(url):
     print(f"🧪 Testing EMAIL EXTRACTION for: {url}")
@@ -25,13 +24,12 @@ def test_email_extraction(url):
         return None
     
     # Process content
-    combined_content = combine_page_content(scraped_pages)
+    combined_content, content_meta = combine_page_content(scraped_pages)
     print(f"📄 Content length: {len(combined_content):,} chars")
-    
+
     # Check if emails were extracted in preprocessing
-    if "EXTRACTED_EMAILS:" in combined_content:
-        emails_section = combined_content.split("EXTRACTED_EMAILS:")[1].split("\n")[0]
-        print(f"🔍 PRE-EXTRACTED EMAILS: {emails_section}")
+    if content_meta['extracted_emails']:
+        print(f"🔍 PRE-EXTRACTED EMAILS: {', '.join(content_meta['extracted_emails'])}")
     else:
         print("⚠️  No emails found in preprocessing")
     
@@ -48,17 +46,16 @@ def test_email_extraction(url):
         print(f"📍 Address found: {contact.get('address', 'NOT FOUND')}")
         
         # Save results
-        with open(f"email_test_{url.replace('://', '_').replace('/', '_')}.json", 'w') as f:
-            json.dump({
-                'url': url,
-                'email_extraction': {
-                    'email_found': contact.get('email'),
-                    'phone_found': contact.get('phone'),
-                    'address_found': contact.get('address'),
-                    'social_media_found': contact.get('social_media')
-                },
-                'full_contact_info': contact
-            }, f, indent=2)
+        dump_json(f"email_test_{url.replace('://', '_').replace('/', '_')}.json", {
+            'url': url,
+            'email_extraction': {
+                'email_found': contact.get('email'),
+                'phone_found': contact.get('phone'),
+                'address_found': contact.get('address'),
+                'social_media_found': contact.get('social_media')
+            },
+            'full_contact_info': contact
+        })
         
         return extracted_data
     else:
@@ -3,8 +3,20 @@ HTML cleaning and text extraction tool
 Converts raw HTML to clean, structured text for LLM processing
 """
 import re
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 
+# lxml's C parser is several times faster than the pure-Python html.parser;
+# fall back if it isn't installed
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    BS_PARSER = 'lxml'
+    _HAS_LXML = True
+except ImportError:
+    BS_PARSER = 'html.parser'
+    _HAS_LXML = False
+
 class HTMLCleaner:
     def __init__(self):
         # Tags to completely remove (along with their content)
@@ -12,6 +24,30 @@ class HTMLCleaner:
         
         # Tags to keep but extract text from
         self.content_tags = ['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'div', 'span', 'li', 'td', 'th']
+
+        # Pages under this size are error/redirect stubs - not worth a parse
+        self.min_html_chars = 200
+
+        # Cleaned-page cache keyed by URL - combine_page_content and
+        # get_content_summary both clean the same pages, so each page should
+        # only be parsed once per cleaner instance
+        self._cache = {}
+
+        # Precompiled cleaning patterns - _clean_text runs per page, and one
+        # alternation replaces seven separate compile+sub passes
+        self._ws_re = re.compile(r'\s+')
+        self._junk_re = re.compile(
+            '|'.join([
+                r'Cookie Policy',
+                r'Privacy Policy',
+                r'Terms of Service',
+                r'All Rights Reserved',
+                r'Copyright.*?\d{4}',
+                r'Follow us on',
+                r'Subscribe to.*?newsletter'
+            ]),
+            re.IGNORECASE
+        )
     
     def clean_single_page(self, html, url):
         """
@@ -24,70 +60,149 @@ class HTMLCleaner:
         Returns:
             dict: Cleaned content with metadata
         """
-        if not html:
-            return {
-                'url': url,
-                'title': '',
-                'meta_description': '',
-                'cleaned_text': '',
-                'word_count': 0
-            }
-        
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Extract metadata
-        title = soup.find('title')
-        title_text = title.get_text().strip() if title else ''
-        
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        meta_description = meta_desc.get('content', '').strip() if meta_desc else ''
-        
-        # Remove unwanted elements
-        for tag in self.remove_tags:
-            for element in soup.find_all(tag):
-                element.decompose()
-        
-        # Extract clean text
-        text_content = soup.get_text()
-        
+        empty = {
+            'url': url,
+            'title': '',
+            'meta_description': '',
+            'cleaned_text': '',
+            'word_count': 0
+        }
+        # Guard here, not just at call sites: a successful fetch can still
+        # carry an empty/whitespace/stub body, which lxml refuses to parse
+        if not html or len(html) < self.min_html_chars:
+            return empty
+
+        cached = self._cache.get(url)
+        if cached is not None:
+            return cached
+
+        if _HAS_LXML:
+            # Work on the lxml tree directly: strip_elements drops the
+            # unwanted subtrees (content included) in C without ever
+            # materializing Python objects for them
+            try:
+                # Parse bytes so XHTML pages with an <?xml encoding=...?>
+                # declaration work - lxml raises ValueError on str input
+                # carrying an encoding declaration
+                tree = lxml_html.fromstring(html.encode('utf-8'))
+            except (etree.ParserError, ValueError):
+                # e.g. "Document is empty" for whitespace-only bodies
+                return empty
+            title_text = (tree.findtext('.//title') or '').strip()
+            meta_description = tree.xpath("string(//meta[@name='description']/@content)").strip()
+            etree.strip_elements(tree, *self.remove_tags, with_tail=False)
+            # text_content() keeps raw whitespace, so normalize here - the
+            # bs4 branch gets this for free from get_text(strip=True)
+            text_content = self._ws_re.sub(' ', tree.text_content())
+        else:
+            soup = BeautifulSoup(html, BS_PARSER)
+
+            # Extract metadata
+            title = soup.find('title')
+            title_text = title.get_text().strip() if title else ''
+
+            meta_desc = soup.find('meta', attrs={'name': 'description'})
+            meta_description = meta_desc.get('content', '').strip() if meta_desc else ''
+
+            # Remove unwanted elements
+            for tag in self.remove_tags:
+                for element in soup.find_all(tag):
+                    element.decompose()
+
+            # Extract clean text - let bs4 join and strip node text in one
+            # pass instead of normalizing the whitespace afterwards
+            text_content = soup.get_text(separator=' ', strip=True)
+
         # Clean up the text
         cleaned_text = self._clean_text(text_content)
         
-        return {
+        result = {
             'url': url,
             'title': title_text,
             'meta_description': meta_description,
             'cleaned_text': cleaned_text,
             'word_count': len(cleaned_text.split())
         }
+        self._cache[url] = result
+        return result
     
     def _clean_text(self, text):
         """Clean and normalize extracted text"""
         if not text:
             return ""
         
-        # Remove extra whitespace and normalize
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove common navigation/footer text patterns
-        patterns_to_remove = [
-            r'Cookie Policy',
-            r'Privacy Policy',
-            r'Terms of Service',
-            r'All Rights Reserved',
-            r'Copyright.*?\d{4}',
-            r'Follow us on',
-            r'Subscribe to.*?newsletter'
-        ]
-        
-        for pattern in patterns_to_remove:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-        
+        # Remove common navigation/footer text patterns in one pass
+        text = self._junk_re.sub('', text)
+
         # Clean up extra spaces again
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
-    
+        return self._ws_re.sub(' ', text).strip()
+
+    def _worth_cleaning(self, page_data):
+        """True when the page fetched successfully with enough HTML to parse"""
+        html = page_data.get('html')
+        return bool(page_data.get('success') and html and len(html) >= self.min_html_chars)
+
+    def _warm_cache(self, scraped_pages):
+        """Clean uncached pages concurrently - lxml releases the GIL while
+        parsing, so threads overlap the heavy parse work and the ordered
+        assembly afterwards runs entirely off cache hits"""
+        to_clean = {
+            data['url']: data['html']
+            for data in scraped_pages.values()
+            if self._worth_cleaning(data) and data['url'] not in self._cache
+        }
+        if len(to_clean) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(to_clean))) as executor:
+                for url, html in to_clean.items():
+                    executor.submit(self.clean_single_page, html, url)
+
+    def clean_all(self, scraped_pages):
+        """Clean every page and return combined text plus summary stats
+
+        One traversal replacing the combine_page_content/get_content_summary
+        pair, so callers that need both the text and the stats don't walk
+        the page dict twice.
+        """
+        self._warm_cache(scraped_pages)
+
+        combined_sections = []
+        page_summaries = []
+        total_words = 0
+        successful_pages = 0
+
+        # Homepage first, then the rest in scrape order
+        ordered = sorted(scraped_pages.items(), key=lambda kv: kv[0] != 'homepage')
+
+        for page_key, page_data in ordered:
+            if page_data.get('success'):
+                successful_pages += 1
+            if not self._worth_cleaning(page_data):
+                continue
+
+            cleaned = self.clean_single_page(page_data['html'], page_data['url'])
+            total_words += cleaned['word_count']
+            page_summaries.append({
+                'page': page_key,
+                'url': page_data['url'],
+                'title': cleaned['title'],
+                'word_count': cleaned['word_count']
+            })
+
+            if cleaned['cleaned_text']:
+                if page_key == 'homepage':
+                    header = 'HOMEPAGE'
+                else:
+                    header = (cleaned['title'] or page_data['url']).upper()
+                combined_sections.append((header, cleaned['cleaned_text']))
+
+        return {
+            'combined_text': "\n\n".join(f"=== {h} ===\n{b}" for h, b in combined_sections),
+            'total_pages': len(scraped_pages),
+            'successful_pages': successful_pages,
+            'total_words': total_words,
+            'page_summaries': page_summaries
+        }
+
     def combine_page_content(self, scraped_pages):
         """
         Combine content from multiple scraped pages into one coherent text
@@ -98,30 +213,34 @@ class HTMLCleaner:
         Returns:
             str: Combined cleaned content from all pages
         """
+        # (header, body) pairs, formatted once at join time rather than
+        # materializing an intermediate concatenated string per section
         combined_sections = []
-        
+
+        self._warm_cache(scraped_pages)
+
         # Process homepage first
-        if 'homepage' in scraped_pages and scraped_pages['homepage']['success']:
+        if 'homepage' in scraped_pages and self._worth_cleaning(scraped_pages['homepage']):
             homepage_data = self.clean_single_page(
                 scraped_pages['homepage']['html'], 
                 scraped_pages['homepage']['url']
             )
             
             if homepage_data['cleaned_text']:
-                combined_sections.append(f"=== HOMEPAGE ===\n{homepage_data['cleaned_text']}")
+                combined_sections.append(('HOMEPAGE', homepage_data['cleaned_text']))
         
         # Process other pages
         for page_key, page_data in scraped_pages.items():
-            if page_key == 'homepage' or not page_data['success']:
+            if page_key == 'homepage' or not self._worth_cleaning(page_data):
                 continue
-            
+
             cleaned_data = self.clean_single_page(page_data['html'], page_data['url'])
             
             if cleaned_data['cleaned_text']:
                 page_title = cleaned_data['title'] or page_data['url']
-                combined_sections.append(f"=== {page_title.upper()} ===\n{cleaned_data['cleaned_text']}")
-        
-        return "\n\n".join(combined_sections)
+                combined_sections.append((page_title.upper(), cleaned_data['cleaned_text']))
+
+        return "\n\n".join(f"=== {header} ===\n{body}" for header, body in combined_sections)
     
     def get_content_summary(self, scraped_pages):
         """Get a summary of the content extraction results"""
@@ -132,7 +251,7 @@ class HTMLCleaner:
         total_words = 0
         
         for page_key, page_data in scraped_pages.items():
-            if page_data['success']:
+            if self._worth_cleaning(page_data):
                 cleaned_data = self.clean_single_page(page_data['html'], page_data['url'])
                 total_words += cleaned_data['word_count']
                 
@@ -2,13 +2,18 @@
 Scrape Workflow - Orchestrates the complete website scraping and data extraction process
 Flow: scrape → clean → extract → save
 """
+import gzip
+import json
+import os
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from tools.web_scraper import WebScraper
 from tools.html_cleaner import HTMLCleaner
 from agents.scraper_agent import ScraperAgent
 from shared_services.supabase_client import supabase
 
+UTC = timezone.utc
+
 class ScrapeWorkflow:
     def __init__(self):
         self.web_scraper = WebScraper()
@@ -26,9 +31,25 @@ class ScrapeWorkflow:
         Returns:
             dict: Complete workflow results
         """
-        # Generate job ID
-        job_id = str(uuid.uuid4())
-        start_time = datetime.utcnow()
+        # Reuse a recent completed job for this URL instead of re-spending
+        # ScraperAPI credits and re-running extraction
+        cached_job = self._find_recent_job(url)
+        if cached_job:
+            print(f"Cache hit: reusing scrape job {cached_job['id']} for {url}")
+            return {
+                'job_id': cached_job['id'],
+                'url': url,
+                'user_id': user_id,
+                'status': 'completed',
+                'success': True,
+                'cached': True,
+                'extracted_data': cached_job.get('extracted_data'),
+                'database_id': cached_job['id']
+            }
+
+        # Generate job ID (.hex skips the dash formatting - same entropy)
+        job_id = uuid.uuid4().hex
+        start_time = datetime.now(UTC)
         
         print(f"Starting scrape workflow")
         print(f"Job ID: {job_id}")
@@ -51,13 +72,19 @@ class ScrapeWorkflow:
             print("\nSTEP 1: WEB SCRAPING")
             print("-" * 40)
             
-            scraping_result = self.web_scraper.scrape_website(url)
+            # Clean each page as soon as it arrives - the cleaner memoizes
+            # per URL, so the combine/summary steps below become cache hits
+            # instead of a serial parse pass after all fetches finish
+            scraping_result = self.web_scraper.scrape_website(
+                url,
+                on_page=lambda page: self.html_cleaner.clean_single_page(page['html'], page['url'])
+            )
             
             if not scraping_result['success']:
                 workflow_result.update({
                     'status': 'failed',
                     'error': scraping_result.get('error', 'Scraping failed'),
-                    'completed_at': datetime.utcnow().isoformat()
+                    'completed_at': datetime.now(UTC).isoformat(timespec='seconds')
                 })
                 return workflow_result
             
@@ -69,15 +96,16 @@ class ScrapeWorkflow:
             print(f"\nSTEP 2: CONTENT CLEANING")
             print("-" * 40)
             
-            cleaned_content = self.html_cleaner.combine_page_content(scraping_result['pages_scraped'])
-            content_summary = self.html_cleaner.get_content_summary(scraping_result['pages_scraped'])
-            
+            # Single traversal for both the combined text and the stats
+            clean_result = self.html_cleaner.clean_all(scraping_result['pages_scraped'])
+            cleaned_content = clean_result['combined_text']
+
             print(f"Combined content: {len(cleaned_content):,} characters")
-            print(f"Total words: {content_summary['total_words']:,}")
-            print(f"Successfully cleaned {content_summary['successful_pages']}/{content_summary['total_pages']} pages")
-            
+            print(f"Total words: {clean_result['total_words']:,}")
+            print(f"Successfully cleaned {clean_result['successful_pages']}/{clean_result['total_pages']} pages")
+
             workflow_result['cleaned_content_length'] = len(cleaned_content)
-            workflow_result['total_words'] = content_summary['total_words']
+            workflow_result['total_words'] = clean_result['total_words']
             
             # Step 3: Data Extraction
             workflow_result['status'] = 'extracting'
@@ -108,7 +136,7 @@ class ScrapeWorkflow:
                 extracted_data=extracted_data,
                 metadata={
                     'scraping_success_rate': scraping_result['success_rate'],
-                    'total_words': content_summary['total_words'],
+                    'total_words': clean_result['total_words'],
                     'extraction_valid': is_valid,
                     'validation_message': validation_message
                 }
@@ -125,7 +153,7 @@ class ScrapeWorkflow:
             workflow_result.update({
                 'status': 'completed',
                 'success': True,
-                'completed_at': datetime.utcnow().isoformat()
+                'completed_at': datetime.now(UTC).isoformat(timespec='seconds')
             })
             
             # Print summary
@@ -146,43 +174,87 @@ class ScrapeWorkflow:
                 'status': 'failed',
                 'success': False,
                 'error': str(e),
-                'completed_at': datetime.utcnow().isoformat()
+                'completed_at': datetime.now(UTC).isoformat(timespec='seconds')
             })
             return workflow_result
     
+    def _find_recent_job(self, url):
+        """Look up a fresh completed scrape_jobs row for this URL, if any
+
+        TTL defaults to 24h; set SCRAPE_CACHE_TTL_HOURS=0 to force fresh
+        scrapes. Lookup failures fall through to a normal scrape.
+        """
+        try:
+            ttl_hours = int(os.getenv('SCRAPE_CACHE_TTL_HOURS', 24))
+            if ttl_hours <= 0:
+                return None
+
+            cutoff = (datetime.now(UTC) - timedelta(hours=ttl_hours)).isoformat(timespec='seconds')
+            result = (
+                supabase.table('scrape_jobs')
+                .select('id, url, extracted_data, created_at')
+                .eq('url', url)
+                .eq('status', 'completed')
+                .gte('created_at', cutoff)
+                .order('created_at', desc=True)
+                .limit(1)
+                .execute()
+            )
+            if result.data:
+                return result.data[0]
+        except Exception as e:
+            print(f"Cache lookup failed (continuing with fresh scrape): {e}")
+        return None
+
     def _save_to_database(self, job_id, user_id, url, raw_pages, cleaned_content, extracted_data, metadata):
         """Save workflow results to Supabase database"""
         try:
+            # One clock read for all four timestamp columns
+            now_iso = datetime.now(UTC).isoformat(timespec='seconds')
+
+            # Raw HTML goes to object storage, not the jobs row - multi-MB
+            # inserts dominated DB latency. The row keeps only a pointer, and
+            # gzip typically shrinks the HTML 5-10x before upload.
+            raw_html_path = None
+            try:
+                blob = gzip.compress(json.dumps(raw_pages).encode('utf-8'))
+                raw_html_path = f"{job_id}.json.gz"
+                supabase.storage.from_('raw_html').upload(raw_html_path, blob)
+            except Exception as storage_error:
+                print(f"Raw HTML upload failed (metadata still saved): {storage_error}")
+                raw_html_path = None
+
             # Prepare data for database
             scrape_job_data = {
                 'id': job_id,
                 'user_id': user_id,
                 'url': url,
                 'status': 'completed',
-                'raw_pages': raw_pages,
+                'raw_html_path': raw_html_path,
                 'cleaned_content': cleaned_content,
                 'extracted_data': extracted_data,
-                'scraping_started_at': datetime.utcnow().isoformat(),
-                'scraping_completed_at': datetime.utcnow().isoformat(),
-                'created_at': datetime.utcnow().isoformat(),
-                'updated_at': datetime.utcnow().isoformat()
+                'scraping_started_at': now_iso,
+                'scraping_completed_at': now_iso,
+                'created_at': now_iso,
+                'updated_at': now_iso
             }
             
             # Add metadata fields
             if metadata:
                 scrape_job_data.update({
-                    'pages_scraped': [f"page_{i}" for i in range(len(raw_pages))],
+                    # The keys are the page names - rebuilding them as
+                    # page_0..N-1 was both wasted work and wrong (it missed
+                    # 'homepage' and was off by one on the page_N numbering)
+                    'pages_scraped': list(raw_pages),
                     'scraper_response_codes': {k: v.get('status_code') for k, v in raw_pages.items()},
-                    'content_lengths': {k: len(v.get('html', '')) for k, v in raw_pages.items()},
+                    'content_lengths': {k: v.get('content_length', 0) for k, v in raw_pages.items()},
                 })
             
-            # Insert into database
-            result = supabase.table('scrape_jobs').insert(scrape_job_data).execute()
-            
-            if result.data:
-                return {'success': True, 'id': job_id}
-            else:
-                return {'success': False, 'error': 'Database insert failed'}
+            # Insert into database. returning='minimal' stops PostgREST from
+            # echoing the whole row back - we only ever use the job_id we
+            # generated, so a failed insert surfaces as an exception instead
+            supabase.table('scrape_jobs').insert(scrape_job_data, returning='minimal').execute()
+            return {'success': True, 'id': job_id}
                 
         except Exception as e:
             return {'success': False, 'error': str(e)}